@@ -1,21 +1,26 @@
-import json
 from collections import Counter
 
-with open('servers.json', 'r') as file:
-    data = json.load(file)
+import ijson
+
+stopped_servers = []
+role_count = Counter()
 
 print("------Start----")
-for server in data['servers']:
-    if server['status'] == 'running':
-        print(f"Server: {server['name']}, Ip: {server['ip']}.")
+# Stream the inventory one server at a time: memory stays at one record and
+# running servers are reported as soon as they are parsed.
+with open('servers.json', 'rb') as file:
+    for server in ijson.items(file, 'servers.item'):
+        role_count[server['role']] += 1
+        status = server['status']
+        if status == 'running':
+            print(f"Server: {server['name']}, Ip: {server['ip']}.")
+        elif status == 'stopped':
+            stopped_servers.append(server['name'])
 
-roles = [server['role'] for server in data['servers']]
-role_count = Counter(roles)
 for role, count in role_count.items():
     print(f"Role: {role}, Count: {count}.")
 
-stopped_servers = [server['name'] for server in data['servers'] if server['status'] == 'stopped']
 if stopped_servers:
     print("Stopped servers:")
     for server in stopped_servers:
-        print(server)
\ No newline at end of file
+        print(server)
@@ -1,37 +1,70 @@
 # Scale AKS pods based on weather conditions
+import logging
 import requests
-import subprocess
 import os
+import urllib3
+from kubernetes import client, config
+from kubernetes.client.rest import ApiException
+from kubernetes.config.config_exception import ConfigException
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Shared session: keep-alive connections to the weather API are reused
+# across calls instead of reconnecting every time.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
 
 def get_weather(city):
     api_key = os.getenv('WEATHER_API_KEY')
     if api_key is None:
-      print("API key not set. Please set the WEATHER_API_KEY environment variable.")
+      logger.error("API key not set. Please set the WEATHER_API_KEY environment variable.")
       return
 
     weather_api = f'http://api.weatherapi.com/v1/current.json?key={api_key}&q={city}'
-    response = requests.get(weather_api)
+    response = _SESSION.get(weather_api, timeout=(3.05, 10))
     data = response.json()
     if 'error' not in data:
         weather = data['current'] ['condition']['text']
         temperature = data['current']['temp_c']
-        print(f"weather: {weather}, temperature: {temperature}°C")
+        # %-style args are only formatted if the record is actually emitted
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("weather: %s, temperature: %s°C", weather, temperature)
         if "Heavy rain" in weather:
-            print("Heavy rain detected, Scaling pods number in AKS.")
+            logger.info("Heavy rain detected, Scaling pods number in AKS.")
             scale_aks_pods(namespace="shopping", deployment="shopping-service", replicas=3)
         else:
-            print("No Heavy rain detected, No Scaling pods.")
+            logger.info("No Heavy rain detected, No Scaling pods.")
     else:
-        print("Error fetching weather data:", data['error']['message'])
+        logger.error("Error fetching weather data: %s", data['error']['message'])
+
+_APPS = None
+
+def get_apps_api():
+    # Built on first use so runs without heavy rain never touch kubeconfig;
+    # the client then reuses its connection pool for every later call.
+    global _APPS
+    if _APPS is None:
+        try:
+            config.load_incluster_config()
+        except ConfigException:
+            config.load_kube_config()
+        _APPS = client.AppsV1Api()
+    return _APPS
 
 def scale_aks_pods(namespace, deployment, replicas):
     try:
-        subprocess.run([
-            'kubectl', 'scale', f'deployment/{deployment}', f'--replicas={replicas}', '-n', namespace
-        ], check=True)
-        print(f"Scaled {deployment} to {replicas} replicas in namespace {namespace}.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error scaling deployment: {e}")
+        get_apps_api().patch_namespaced_deployment_scale(
+            deployment, namespace, {'spec': {'replicas': replicas}}
+        )
+        logger.info("Scaled %s to %s replicas in namespace %s.", deployment, replicas, namespace)
+    except (ApiException, ConfigException, urllib3.exceptions.HTTPError) as e:
+        # Same outcome kubectl gave for an API error, a missing/invalid
+        # kubeconfig or an unreachable API server: log it and carry on
+        logger.error("Error scaling deployment: %s", e)
 
 #Usage:
+logging.basicConfig(level=logging.INFO, format="%(message)s")
 get_weather("Tunis")
\ No newline at end of file
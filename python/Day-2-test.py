@@ -1,34 +1,49 @@
 import datetime
 import random
 
+MESSAGES = {
+    "INFO": [
+        "Server started successfully",
+        "User logged in",
+        "Request processed successfully",
+        "Configuration loaded"
+    ],
+    "WARNING": [
+        "Low disk space",
+        "High CPU usage",
+        "Network latency detected"
+    ],
+    "ERROR": [
+        "Database connection failed",
+        "Timeout occurred",
+        "Permission denied",
+        "File not found"
+    ],
+}
+
+ENCODED_MESSAGES = {
+    level.encode(): [message.encode() for message in messages]
+    for level, messages in MESSAGES.items()
+}
+
 def generate_log_file(filename, num_entries):
-    with open(filename, "w") as f:
-        current_time = datetime.datetime(2023, 10, 1, 0, 0, 0)
-        for _ in range(num_entries):
-            log_level = random.choice(["INFO", "WARNING", "ERROR"])
-            if log_level == "INFO":
-                message = random.choice([
-                    "Server started successfully",
-                    "User logged in",
-                    "Request processed successfully",
-                    "Configuration loaded"
-                ])
-            elif log_level == "WARNING":
-                message = random.choice([
-                    "Low disk space",
-                    "High CPU usage",
-                    "Network latency detected"
-                ])
-            else:
-                message = random.choice([
-                    "Database connection failed",
-                    "Timeout occurred",
-                    "Permission denied",
-                    "File not found"
-                ])
-            log_entry = f"{current_time.strftime('%Y-%m-%d %H:%M:%S')} {log_level} {message}"
-            f.write(log_entry + "\n")
-            current_time += datetime.timedelta(minutes=1)
+    # Draw every level up front and build the whole file in one buffer
+    levels = random.choices(list(ENCODED_MESSAGES), k=num_entries)
+    start_date = datetime.date(2023, 10, 1)  # entries start at midnight
+    buf = bytearray()
+    current_day = None
+    for i, level in enumerate(levels):
+        # One entry per minute: only the date needs real calendar math, and
+        # only when the day rolls over.
+        day, minute_of_day = divmod(i, 24 * 60)
+        if day != current_day:
+            current_day = day
+            date_b = (start_date + datetime.timedelta(days=day)).isoformat().encode()
+        hour, minute = divmod(minute_of_day, 60)
+        message = random.choice(ENCODED_MESSAGES[level])
+        buf += b"%s %02d:%02d:00 %s %s\n" % (date_b, hour, minute, level, message)
+    with open(filename, "wb") as f:
+        f.write(buf)
 
 generate_log_file("server1.log", 1000)
-generate_log_file("server2.log", 1000)
\ No newline at end of file
+generate_log_file("server2.log", 1000)
@@ -1,26 +1,108 @@
 # Extract Python error messages from log files by timestamp and log level
 
+import calendar
 import glob
-from datetime import datetime
-
-with open("errors.log", "w") as error_file:
-    for file_path in glob.glob("*.log"):
-        server_name = file_path.split(".")[0]
-        try:
-            with open(file_path, "r") as log_file:
-                for line in log_file:
-                    parts = line.split()
-                    if len(parts) >= 4 and parts[2] == "ERROR":
-                        timestamp_str = parts[0] + " " + parts[1]
-                        error_message = " ".join(parts[3:])
-                        try:
-                            timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                            formatted_time = timestamp.strftime("%d %B %Y at %I:%M%p").lower()
-                            output_message = f"This occurred on {formatted_time}: {error_message}"
-                            error_file.write(f"{server_name}: {output_message}\n")
-                        except ValueError:
-                            print(f"Warning: Invalid timestamp in {file_path}: {line.strip()}")
-        except FileNotFoundError:
-            print(f"Warning: {file_path} not found. Skipping.")
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
\ No newline at end of file
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# "<date> <time> ERROR <message>", matched in place against the file buffer.
+# Separators are spaces/tabs only so a match can never run across lines.
+LINE_RE = re.compile(rb"[ \t]*(\S+)[ \t]+(\S+)[ \t]+ERROR[ \t]+(\S.*)")
+
+MONTHS = (
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+)
+
+
+def format_timestamp(date_str, time_str):
+    # Hand-rolled equivalent of strptime("%Y-%m-%d %H:%M:%S") followed by
+    # strftime("%d %B %Y at %I:%M%p").lower(), without building a datetime.
+    # Accepts what strptime accepts: a 4-digit year and 1- or 2-digit other
+    # fields ("2023-1-5 1:02:03"), ASCII digits only; rejects signs, spaces,
+    # day numbers past the end of that month (leap years included), year 0.
+    date_fields = date_str.split("-"); time_fields = time_str.split(":")
+    fields = date_fields + time_fields
+    if (len(date_fields) != 3 or len(time_fields) != 3 or len(fields[0]) != 4
+            or not all(0 < len(f) <= 2 for f in fields[1:])
+            or not all(f.isascii() and f.isdigit() for f in fields)):
+        raise ValueError(f"invalid timestamp: {date_str} {time_str}")
+    year, month, day, hour, minute, second = map(int, fields)
+    if not (year >= 1 and 1 <= month <= 12 and hour <= 23 and minute <= 59 and second <= 59
+            and 1 <= day <= calendar.monthrange(year, month)[1]):
+        raise ValueError(f"invalid timestamp: {date_str} {time_str}")
+    hour12 = ((hour - 1) % 12) + 1
+    ampm = "am" if hour < 12 else "pm"
+    return f"{day:02d} {MONTHS[month - 1]} {year} at {hour12:02d}:{minute:02d}{ampm}"
+
+
+# (date, time) -> formatted time; errors often share a timestamp
+ts_cache: dict[tuple[bytes, bytes], str] = {}
+
+
+def scan_errors(data, server_name, file_path, out_lines):
+    # Jump from one ERROR to the next over the whole buffer (a C-level
+    # scan) instead of visiting every line; most lines aren't errors.
+    append = out_lines.append
+    pos = 0
+    while (i := data.find(b"ERROR", pos)) >= 0:
+        # "YYYY-MM-DD HH:MM:SS " is fixed width, so a well-formed line
+        # starts 20 bytes before its level; only search back otherwise.
+        start = i - 20
+        if start < 0 or (start and data[start - 1] != 10) or data.find(b"\n", start, i) >= 0:
+            start = data.rfind(b"\n", 0, i) + 1
+        end = data.find(b"\n", i)
+        if end < 0:
+            end = len(data)
+        pos = end + 1
+        # Stay in bytes; only the message (and timestamps on a cache
+        # miss) ever get decoded.
+        m = LINE_RE.match(data, start, end)
+        if m is not None:
+            error_message = b" ".join(m[3].split()).decode()
+            try:
+                key = (m[1], m[2])
+                formatted_time = ts_cache.get(key)
+                if formatted_time is None:
+                    formatted_time = ts_cache[key] = format_timestamp(key[0].decode(), key[1].decode())
+                output_message = f"This occurred on {formatted_time}: {error_message}"
+                append(f"{server_name}: {output_message}\n")
+            except ValueError:
+                print(f"Warning: Invalid timestamp in {file_path}: {data[start:end].decode().strip()}")
+
+
+def parse_file(file_path):
+    server_name = file_path.split(".")[0]
+    out_lines = []
+    try:
+        with open(file_path, "rb") as log_file:
+            # Map the file instead of reading it: pages are faulted in as the
+            # scan reaches them and dropped behind it. Empty files can't be
+            # mapped (and have nothing to scan).
+            if os.fstat(log_file.fileno()).st_size:
+                with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        data.madvise(mmap.MADV_SEQUENTIAL)
+                    scan_errors(data, server_name, file_path, out_lines)
+    except FileNotFoundError:
+        print(f"Warning: {file_path} not found. Skipping.")
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+    # One string per file: a single object to pickle back to the parent and
+    # a single write there.
+    return "".join(out_lines)
+
+
+def main():
+    # Files are independent, so parse them on all cores; only this process
+    # writes to errors.log, in the same order glob returned the files.
+    files = [f for f in glob.glob("*.log") if f != "errors.log"]
+    with ProcessPoolExecutor() as ex, open("errors.log", "w") as error_file:
+        for text in ex.map(parse_file, files, chunksize=4):
+            error_file.write(text)
+
+
+if __name__ == "__main__":
+    main()
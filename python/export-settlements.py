@@ -1,24 +1,47 @@
 #!/usr/bin/env python3
+import asyncio
+import hashlib
+import json
+import mmap
 import os
+import shutil
 import sys
+import threading
 from pathlib import Path
-from urllib.request import urlopen
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 import smtplib
+import tempfile
+from contextlib import contextmanager
+from email.generator import BytesGenerator
 from email.message import EmailMessage
-from playwright.sync_api import sync_playwright
+from email.utils import getaddresses
+from playwright.async_api import async_playwright
 
 BILATERAL_REPORT_URL = "https://finance-portal.int.kabiloo.ml.gisp.gm/api/reports/report-bilateral-settlement"
 DFSP_DETAIL_URL = "https://finance-portal.int.kabiloo.ml.gisp.gm/api/reports/dfspSettlementDetail"
 SETTLEMENT_JSON_URL = "https://finance-portal.int.gisp-stg.ml.gisp.gm/api/central-settlements/settlements"
-
-
-def render_pdf(page, url: str, output: Path) -> None:
-    page.goto(url, wait_until="networkidle", timeout=120_000)
-    page.add_style_tag(content="""
+CACHE_DIR = Path(os.getenv("SETTLEMENTS_CACHE_DIR", Path.home() / ".cache" / "settlements"))
+BROWSER_PROFILE_DIR = CACHE_DIR / "chromium"
+DOWNLOAD_CACHE_DIR = CACHE_DIR / "downloads"
+DOWNLOAD_CACHE_INDEX = DOWNLOAD_CACHE_DIR / "urls.json"
+
+# Both downloads run on worker threads and share the cache index.
+_download_cache_lock = threading.Lock()
+
+
+async def render_pdf(page, url: str, output: Path) -> None:
+    # The reports expose no ready marker, so wait for the load event and for
+    # web fonts (blank glyphs otherwise) rather than 500 ms of network
+    # silence, which periodic requests can stretch to the full timeout.
+    await page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+    await page.wait_for_load_state("load", timeout=60_000)
+    await page.evaluate("document.fonts.ready.then(() => true)")
+    await page.add_style_tag(content="""
         * { -webkit-print-color-adjust: exact !important; print-color-adjust: exact !important; }
     """)
-    page.pdf(
+    await page.pdf(
         path=str(output),
         landscape=False,
         scale=0.8,
@@ -28,14 +51,121 @@ def render_pdf(page, url: str, output: Path) -> None:
     )
 
 
+def load_download_cache() -> dict:
+    try:
+        return json.loads(DOWNLOAD_CACHE_INDEX.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def update_download_cache(url: str, entry: dict | None) -> None:
+    # entry=None forgets the URL and its cached copy.
+    with _download_cache_lock:
+        index = load_download_cache()
+        if entry is None:
+            old = index.pop(url, None)
+            if old is None:
+                return
+            Path(old["path"]).unlink(missing_ok=True)
+        else:
+            index[url] = entry
+        tmp = DOWNLOAD_CACHE_INDEX.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(index, indent=2))
+        os.replace(tmp, DOWNLOAD_CACHE_INDEX)
+
+
+def download_cached(url: str, output: Path) -> None:
+    # Conditional GET against the last copy we fetched: an unchanged report
+    # comes back as a bodiless 304 and is copied from the local cache.
+    DOWNLOAD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cached = DOWNLOAD_CACHE_DIR / hashlib.sha256(url.encode()).hexdigest()
+    with _download_cache_lock:
+        entry = load_download_cache().get(url)
+
+    headers = {}
+    if entry and cached.exists():
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        with urlopen(Request(url, headers=headers), timeout=120) as resp, open(output, "wb") as fh:
+            shutil.copyfileobj(resp, fh, length=1 << 20)
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+    except HTTPError as e:
+        if e.code != 304 or not headers:
+            raise
+        shutil.copyfile(cached, output)
+        return
+
+    # Every 200 replaces what we knew about the URL: a response without
+    # validators must not leave older ones pointing at a stale copy.
+    if etag or last_modified:
+        shutil.copyfile(output, cached)
+        update_download_cache(url, {"etag": etag, "last_modified": last_modified, "path": str(cached)})
+    else:
+        update_download_cache(url, None)
+
+
 def download_json(url: str, output: Path) -> None:
-    with urlopen(url, timeout=120) as resp:
-        output.write_bytes(resp.read())
+    download_cached(url, output)
 
 
 def download_file(url: str, output: Path) -> None:
-    with urlopen(url, timeout=120) as resp:
-        output.write_bytes(resp.read())
+    download_cached(url, output)
+
+
+@contextmanager
+def open_attachment(path: Path):
+    # Map the file so the encoder pages it in on demand instead of copying the
+    # whole attachment into a bytes object first (empty files can't be mapped).
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            yield view
+
+
+def send_spooled_message(smtp: smtplib.SMTP, sender: str, recipients: list[str], spool) -> dict:
+    # smtplib.SMTP.sendmail, but the DATA payload is read from a file in
+    # chunks (with the same dot-stuffing) instead of from one bytes object.
+    # Like sendmail, it only fails if every recipient is refused and returns
+    # the refused ones otherwise.
+    code, resp = smtp.mail(sender)
+    if code != 250:
+        raise smtplib.SMTPSenderRefused(code, resp, sender)
+    refused = {}
+    for recipient in recipients:
+        code, resp = smtp.rcpt(recipient)
+        if code not in (250, 251):
+            refused[recipient] = (code, resp)
+    if len(refused) == len(recipients):
+        raise smtplib.SMTPRecipientsRefused(refused)
+    smtp.putcmd("data")
+    code, resp = smtp.getreply()
+    if code != 354:
+        raise smtplib.SMTPDataError(code, resp)
+
+    chunk = bytearray()
+    line = b"\r\n"
+    for line in spool:
+        if line.startswith(b"."):
+            chunk += b"."
+        chunk += line
+        if len(chunk) >= 1 << 16:
+            smtp.send(bytes(chunk))
+            chunk.clear()
+    if not line.endswith(b"\r\n"):
+        chunk += b"\r\n"
+    chunk += b".\r\n"
+    smtp.send(bytes(chunk))
+    code, resp = smtp.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
 
 
 def send_email(
@@ -57,19 +187,29 @@ def send_email(
     msg.set_content(body)
 
     for attachment in attachments:
-        msg.add_attachment(
-            attachment.read_bytes(),
-            maintype="application",
-            subtype="octet-stream",
-            filename=attachment.name,
-        )
-
-    with smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=60) as smtp:
-        smtp.login(username, password)
-        smtp.send_message(msg)
-
-
-def main() -> int:
+        with open_attachment(attachment) as data:
+            msg.add_attachment(
+                data,
+                maintype="application",
+                subtype="octet-stream",
+                filename=attachment.name,
+            )
+
+    # Spool the encoded message to disk and drop the in-memory copy, instead
+    # of letting send_message flatten it into yet another bytes buffer.
+    # Envelope recipients the way send_message picks them: every address in
+    # To/Cc, so a comma-separated recipient list still reaches everyone.
+    recipients = [addr for _, addr in getaddresses(msg.get_all("To", []) + msg.get_all("Cc", [])) if addr]
+    with tempfile.TemporaryFile() as spool:
+        BytesGenerator(spool).flatten(msg, linesep="\r\n")
+        del msg
+        spool.seek(0)
+        with smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=60) as smtp:
+            smtp.login(username, password)
+            send_spooled_message(smtp, sender, recipients, spool)
+
+
+async def main() -> int:
     if len(sys.argv) not in (5, 6):
         print(
             "Usage: export_dfsp_settlement_detail_pdf.py <settlementId> <yyyymmdd> <fspId1> <fspId2> [fspId3]",
@@ -105,37 +245,49 @@ def main() -> int:
         else None
     )
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
+    # The report pages render side by side, since each mostly waits on the
+    # portal to finish loading.
+    renders = [
+        (bilateral_url, bilateral_pdf),
+        (dfsp_url_1, dfsp_pdf_1),
+        (dfsp_url_2, dfsp_pdf_2),
+    ]
+    if fsp_id_3:
+        renders.append((dfsp_url_3, dfsp_pdf_3))
+
+    # Start the CSV/JSON downloads before Chromium boots so the launch cost
+    # overlaps with network I/O.
+    loop = asyncio.get_running_loop()
+    downloads = [
+        loop.run_in_executor(None, download_file, bilateral_csv_url, bilateral_csv),
+        loop.run_in_executor(None, download_json, settlement_json_url, bilateral_json),
+    ]
+
+    BROWSER_PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    async with async_playwright() as p:
+        # One persistent context shares its HTTP cache across all pages, so
+        # the reports' common JS/CSS/fonts are fetched once.
+        context = await p.chromium.launch_persistent_context(
+            user_data_dir=str(BROWSER_PROFILE_DIR),
             headless=True,
+            viewport={"width": 1920, "height": 1080},
             args=[
                 "--disable-gpu",
                 "--no-sandbox",
                 "--disable-dev-shm-usage",
+                "--disk-cache-size=268435456",
             ],
         )
-        page = browser.new_page(viewport={"width": 1920, "height": 1080})
-
-        # 1) Bilateral net settlement PDF
-        render_pdf(page, bilateral_url, bilateral_pdf)
-
-        # 1b) Bilateral net settlement CSV
-        download_file(bilateral_csv_url, bilateral_csv)
-
-        # 2) Settlement JSON
-        download_json(settlement_json_url, bilateral_json)
+        pages = [await context.new_page() for _ in renders]
 
-        # 3) DFSP detail PDF for first FSP
-        render_pdf(page, dfsp_url_1, dfsp_pdf_1)
-
-        # 4) DFSP detail PDF for second FSP
-        render_pdf(page, dfsp_url_2, dfsp_pdf_2)
-
-        # 5) DFSP detail PDF for third FSP (optional)
-        if fsp_id_3:
-            render_pdf(page, dfsp_url_3, dfsp_pdf_3)
+        await asyncio.gather(
+            # Bilateral net settlement PDF and the DFSP detail PDFs
+            *(render_pdf(page, url, output) for page, (url, output) in zip(pages, renders)),
+            # Bilateral net settlement CSV and settlement JSON
+            *downloads,
+        )
 
-        browser.close()
+        await context.close()
 
     print("Wrote:")
     print(f"  {bilateral_pdf}")
@@ -181,7 +333,7 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    raise SystemExit(asyncio.run(main()))
 
 
 # ~/Downloads/settlements ❯ source .venv/bin/activate
@@ -4,20 +4,32 @@
 NetBird Environment Switcher (Linux-only, runs as normal user)
 """
 
-import os, sys, re, json, subprocess, threading, time, shutil
+import os, sys, re, json, shlex, subprocess, threading, time, shutil, hashlib
+from collections import Counter, deque
+from functools import lru_cache
 from pathlib import Path
+try:
+    import orjson   # faster parse/serialize; the stdlib json path is equivalent
+except ImportError:
+    orjson = None
 from PySide6 import QtCore, QtGui, QtWidgets
 
 APP_DIR = Path(sys.argv[0]).resolve().parent
 ENVS_PATH = APP_DIR / "envs.json"
 
-# Hide noisy QPainter warnings (harmless)
+# Compiled once: these run per status poll, per streamed output line and
+# per line of 'netbird networks list'
+_RE_MGMT = re.compile(r"Management:\s*Connected(?:\s*to)?\s*(https?://[^\s]+)", re.IGNORECASE)
+_RE_ID = re.compile(r"\bID:\s*([A-Za-z0-9][A-Za-z0-9_.-]+)\b")
+_RE_WS2 = re.compile(r"\s{2,}")
+_RE_LEAD = re.compile(r"^[^\w]+")
+# Accepted Management URL prefixes; a plain startswith, no regex needed
+_URL_SCHEMES = ("http://", "https://")
+
+# Hide noisy QPainter warnings (harmless); installed from main()
 def _qt_msg_handler(mode, ctx, msg):
     if msg.startswith("QPainter::"): return
     sys.stderr.write(msg + "\n")
-QtCore.qInstallMessageHandler(_qt_msg_handler)
-
-QtWidgets.QApplication.setStyle("Fusion")
 
 # ---------- platform check (Linux-only) ----------
 def _require_linux_or_exit():
@@ -26,64 +38,126 @@ def _require_linux_or_exit():
         sys.exit(1)
 
 # ---------- CLI ----------
-def run_cmd(cmd: str, timeout: int = 60):
+# Resolved once instead of a PATH lookup (and a /bin/sh) on every call
+NETBIRD_BIN = shutil.which("netbird") or "netbird"
+
+# Short-lived CLI children still running; the window kills them on close so
+# pool workers stuck in a slow command return right away instead of keeping
+# the process alive after the window is gone.
+_children = set(); _children_lock = threading.Lock()
+_shutting_down = threading.Event()
+
+# close_fds=False keeps subprocess on its posix_spawn fast path (with an
+# absolute executable) instead of fork+exec. Nothing leaks: Python creates
+# fds non-inheritable, and pipes for the child are set up explicitly.
+def run_argv(argv: list, timeout: int = 60):
     try:
-        p = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
-        return p.returncode, p.stdout.strip(), p.stderr.strip()
+        with subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              text=True, close_fds=False) as p:
+            with _children_lock:
+                if _shutting_down.is_set(): p.kill()
+                else: _children.add(p)
+            try:
+                out, err = p.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                p.kill(); p.communicate(); raise
+            finally:
+                with _children_lock: _children.discard(p)
+            return p.returncode, out.strip(), err.strip()
     except Exception as e:
         return 255, "", str(e)
 
-def nb_service_start(): return run_cmd("netbird service start", timeout=10)
-def nb_down(): return run_cmd("netbird down")
+def kill_children():
+    with _children_lock:
+        _shutting_down.set(); procs = list(_children)   # and refuse new ones
+    for p in procs:
+        try: p.kill()
+        except OSError: pass
+
+# Last status per detail level: detail -> (monotonic time, (rc, out, err)).
+# Commands that change daemon state drop it once they return.
+_status_cache = {}
+
+def nb_service_start():
+    r = run_argv([NETBIRD_BIN, "service", "start"], timeout=10); _status_cache.clear(); return r
+def nb_down():
+    r = run_argv([NETBIRD_BIN, "down"]); _status_cache.clear(); return r
 def nb_status(detail: bool = True):
-    return run_cmd(f"netbird status{' -d' if detail else ''}")
+    r = run_argv([NETBIRD_BIN, "status", "-d"] if detail else [NETBIRD_BIN, "status"])
+    _status_cache[detail] = (time.monotonic(), r); return r
+def nb_status_cached(detail: bool = True, ttl: float = 0.5):
+    """nb_status, but reuse a result younger than ttl instead of exec'ing again."""
+    hit = _status_cache.get(detail)
+    if hit and time.monotonic() - hit[0] < ttl: return hit[1]
+    return nb_status(detail)
 
 def nb_up_async(url: str):
     """
     """
-    args = ["netbird", "up", "--management-url", url]
+    args = [NETBIRD_BIN, "up", "--management-url", url]
     
     try:
         return subprocess.Popen(
             args,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1
+            bufsize=0,  # raw pipe; _pump_proc_output reads the fd directly
+            close_fds=False
         )
     except Exception:
         return None
+    finally:
+        _status_cache.clear()
 
 def parse_mgmt_url(text: str):
-    m = re.search(r"Management:\s*Connected(?:\s*to)?\s*(https?://[^\s]+)", text, re.IGNORECASE)
+    m = _RE_MGMT.search(text)
     return m.group(1) if m else None
 
-def _pump_proc_output(proc: subprocess.Popen, bus: "UIBus"):
+def mgmt_connected(text: str) -> bool:
+    """Cheap check on plain `netbird status` output (no URL without -d)."""
+    return "Management: Connected" in text
+
+def _pump_proc_output(proc: subprocess.Popen, bus: "UIBus", on_mgmt=None):
     """
     Stream netbird's stdout (merged with stderr) into the Activity Log and
-    auto-open the first https:// URL via xdg-open.
+    auto-open the first https:// URL via xdg-open. If `up` reports
+    "Management: Connected to <url>", on_mgmt(url) is called (once).
     """
     opened = False
+    def handle(line: bytes):
+        nonlocal opened, on_mgmt
+        if not line:
+            return
+        text = line.decode("utf-8", "replace")
+        bus.post_log(text)
+        if on_mgmt and b"Management" in line and (mgmt := parse_mgmt_url(text)):
+            on_mgmt(mgmt); on_mgmt = None
+        if not opened and (i := line.find(b"https://")) >= 0:
+            try:
+                subprocess.Popen(
+                    ["xdg-open", line[i:].split(None, 1)[0].decode("utf-8", "replace")],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL
+                )
+            except Exception:
+                pass
+            opened = True
+
+    fd = proc.stdout.fileno(); pending = b""
     try:
-        for raw in iter(proc.stdout.readline, ''):
-            line = raw.rstrip("\r\n")
-            if not line:
-                continue
-            bus.log.emit(line)
-            if not opened:
-                m = re.search(r'(https://\S+)', line)
-                if m:
-                    try:
-                        subprocess.Popen(
-                            ["xdg-open", m.group(1)],
-                            stdout=subprocess.DEVNULL,
-                            stderr=subprocess.DEVNULL
-                        )
-                    except Exception:
-                        pass
-                    opened = True
+        # Read whatever the pipe has (up to 64 KiB) and split it in C rather
+        # than one readline() per line. splitlines() breaks on \n, \r and
+        # \r\n like the text-mode pipe did and drops the terminators; a
+        # partial last line waits for the next read.
+        while chunk := os.read(fd, 65536):
+            buf = pending + chunk
+            end = max(buf.rfind(b"\n"), buf.rfind(b"\r")) + 1
+            pending = buf[end:]
+            for line in buf[:end].splitlines():
+                handle(line)
+        handle(pending)
     except Exception as e:
-        bus.log.emit(f"! output stream error: {e}")
+        bus.post_log(f"! output stream error: {e}")
 
 # ---------- networks ----------
 def networks_select_all():
@@ -91,74 +165,79 @@ def networks_select_all():
     Select all networks by parsing 'netbird networks list' and feeding the
     resulting *network IDs* to 'netbird networks select'.
     """
-    rc, out, err = run_cmd("netbird networks list")
+    rc, out, err = run_argv([NETBIRD_BIN, "networks", "list"])
     if rc != 0:
         return "netbird networks list", rc, out, err
 
     text = out or ""
     ids = []
 
-    def is_cidr(tok: str) -> bool:
-        return bool(re.match(r"^\d{1,3}(?:\.\d{1,3}){3}/\d{1,2}$", tok))
-
+    # Plain string checks, same shape as the old regexes: four dot-separated
+    # runs of 1-3 digits, optionally with a 1-2 digit prefix length.
     def is_ip(tok: str) -> bool:
-        return bool(re.match(r"^\d{1,3}(?:\.\d{1,3}){3}$", tok))
+        parts = tok.split(".")
+        return len(parts) == 4 and all(0 < len(c) <= 3 and c.isdecimal() for c in parts)
 
-    # 1) Key-value style lines: "... ID: <id> ..."
-    for line in text.splitlines():
-        m = re.search(r"\bID:\s*([A-Za-z0-9][A-Za-z0-9_.-]+)\b", line)
+    def is_cidr(tok: str) -> bool:
+        addr, sep, bits = tok.partition("/")
+        return bool(sep) and 0 < len(bits) <= 2 and bits.isdecimal() and is_ip(addr)
+
+    # 1) Key-value style lines: "... ID: <id> ..." (substring test first so
+    # most lines never reach the regex)
+    lines = text.splitlines()
+    for line in lines:
+        if "ID:" not in line:
+            continue
+        m = _RE_ID.search(line)
         if m:
             tok = m.group(1)
             if tok and not is_ip(tok) and not is_cidr(tok):
                 ids.append(tok)
 
-    # 2) Table header with an 'ID' column
+    # 2) Table header with an 'ID' column; split lines into columns only
+    # until the header is found, then once per data row
     if not ids:
-        header_idx = None
-        lines = text.splitlines()
         for i, raw in enumerate(lines):
             s = raw.strip()
             if not s:
                 continue
-            cols = re.split(r"\s{2,}", re.sub(r"^[^\w]+", "", s))
-            if any(c.strip().lower() == "id" for c in cols):
-                for j, c in enumerate(cols):
-                    if c.strip().lower() == "id":
-                        header_idx = j
-                        break
-                for data in lines[i+1:]:
-                    ds = data.strip()
-                    if not ds:
-                        continue
-                    dcols = re.split(r"\s{2,}", re.sub(r"^[^\w]+", "", ds))
-                    if header_idx is not None and len(dcols) > header_idx:
-                        tok = dcols[header_idx].strip()
-                        if tok and tok.lower() != "id" and not is_ip(tok) and not is_cidr(tok):
-                            ids.append(tok)
-                break
+            cols = [c.strip().lower() for c in _RE_WS2.split(_RE_LEAD.sub("", s))]
+            if "id" not in cols:
+                continue
+            header_idx = cols.index("id")
+            for data in lines[i+1:]:
+                ds = data.strip()
+                if not ds:
+                    continue
+                dcols = _RE_WS2.split(_RE_LEAD.sub("", ds))
+                if len(dcols) > header_idx:
+                    tok = dcols[header_idx].strip()
+                    if tok and tok.lower() != "id" and not is_ip(tok) and not is_cidr(tok):
+                        ids.append(tok)
+            break
 
     # De-dup while preserving order
-    seen = set(); uniq = []
-    for i in ids:
-        if i not in seen:
-            seen.add(i); uniq.append(i)
-    ids = uniq
+    ids = list(dict.fromkeys(ids))
 
     if not ids:
         return "parse networks list (IDs)", 1, text, "No network IDs parsed from 'netbird networks list'"
 
-    # Select in safe chunks; quote each id
-    for i in range(0, len(ids), 15):
-        chunk = ids[i:i+15]
-        cmd = "netbird networks select " + " ".join(f'"{x}"' for x in chunk)
-        rc2, out2, err2 = run_cmd(cmd)
-        if rc2 != 0:
-            return cmd, rc2, out2, err2
+    # IDs go to netbird as argv entries, so no quoting is needed. One exec
+    # covers typical inventories; if that fails (e.g. E2BIG) fall back to
+    # chunks. 'select' replaces the current selection, so the chunks run in
+    # order and every one after the first appends (-a).
+    select = [NETBIRD_BIN, "networks", "select"]
+    if run_argv(select + ids)[0] != 0:
+        for i in range(0, len(ids), 15):
+            argv = select + (["-a"] if i else []) + ids[i:i+15]
+            rc2, out2, err2 = run_argv(argv)
+            if rc2 != 0:
+                return shlex.join(["netbird", *argv[1:]]), rc2, out2, err2
 
     return "netbird networks select <ids>", 0, "Selected: " + ", ".join(ids), ""
 
 def networks_refresh():
-    rc, out, err = run_cmd("netbird networks refresh")
+    rc, out, err = run_argv([NETBIRD_BIN, "networks", "refresh"])
 
     def looks_like_help(s: str) -> bool:
         return bool(s) and "Usage:" in s and "netbird networks" in s
@@ -171,21 +250,85 @@ def networks_refresh():
 def ensure_envs_file(p: Path):
     if not p.exists(): p.write_text("[]", encoding="utf-8")
 
-def load_envs(p: Path):
-    ensure_envs_file(p)
-    data = json.loads(p.read_text(encoding="utf-8"))
+@lru_cache(maxsize=8)
+def _load_envs_cached(path: str, mtime_ns: int, size: int):
+    # Keyed on mtime + size: a rewrite of the file is a cache miss (size also
+    # catches a same-tick rewrite on coarse-mtime filesystems)
+    raw = Path(path).read_bytes()
+    data = orjson.loads(raw) if orjson else json.loads(raw)
     if not isinstance(data, list): raise ValueError("envs.json must be a JSON array")
     for i, e in enumerate(data):
         if not isinstance(e, dict) or "name" not in e or "management_url" not in e:
             raise ValueError(f"Item #{i+1} must have 'name' and 'management_url'")
     return data
 
-def save_envs(p: Path, envs: list):
-    p.write_text(json.dumps(envs, indent=2), encoding="utf-8")
+def load_envs(p: Path):
+    ensure_envs_file(p)
+    st = p.stat()
+    data = _load_envs_cached(str(p), st.st_mtime_ns, st.st_size)
+    return [dict(e) for e in data]  # callers mutate; keep the cached copy pristine
+
+def _file_digest(p: Path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""): h.update(chunk)
+    return h.digest()
+
+def save_envs(p: Path, envs: list, last=None):
+    """
+    Write envs to p; returns a token to pass back as `last` next time. With
+    it, a save of the same names/URLs over a file nobody else touched since
+    (same mtime + size) returns before serializing anything.
+    """
+    h = hash(tuple((e["name"], e["management_url"]) for e in envs))
+    try:
+        st = p.stat()
+        if last is not None and last == (h, st.st_mtime_ns, st.st_size):
+            return last
+    except OSError:
+        st = None
+    if orjson:
+        data = orjson.dumps(envs, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(envs, indent=2, ensure_ascii=False).encode("utf-8")
+    # Unchanged content: skip the write (and the mtime bump that would
+    # invalidate the load cache). Size first, hash only when sizes match.
+    if not (st and st.st_size == len(data) and _file_digest(p) == hashlib.blake2b(data, digest_size=16).digest()):
+        # Write beside the target and rename over it so a crash never leaves
+        # a half-written envs.json
+        tmp = p.with_suffix(".json.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, p)
+        st = p.stat()
+    return (h, st.st_mtime_ns, st.st_size)
 
 # ---------- app icon (safe) ----------
+_ICON_SIZES = (16, 24, 32, 48, 64, 128)
+
+# Painted once per size (main() warms it before any window exists); dialogs
+# and message boxes get the same QIcon and its pre-scaled pixmaps back.
+# The painted image is also kept as a PNG in the user's cache dir (not the
+# checkout), so later starts load it instead of painting; bump the version
+# when the drawing changes.
+_ICON_CACHE_VERSION = 1
+_ICON_CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "netbird-switcher"
+
+def _icon_cache_path(size: int) -> Path:
+    return _ICON_CACHE_DIR / f"icon-v{_ICON_CACHE_VERSION}-{size}.png"
+
+@lru_cache(maxsize=None)
 def make_app_icon(size=128) -> QtGui.QIcon:
-    if getattr(make_app_icon, "_icon", None): return make_app_icon._icon
+    img = QtGui.QImage(str(_icon_cache_path(size)))
+    if img.isNull() or img.width() != size or img.height() != size:
+        img = _paint_app_icon(size)
+    # Pre-scale every size title bars/dialogs ask for so Qt never rescales on redraw
+    icon = QtGui.QIcon()
+    for s in _ICON_SIZES:
+        scaled = img if s == size else img.scaled(s, s, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        icon.addPixmap(QtGui.QPixmap.fromImage(scaled))
+    return icon
+
+def _paint_app_icon(size: int) -> QtGui.QImage:
     img = QtGui.QImage(size, size, QtGui.QImage.Format_ARGB32); img.fill(QtCore.Qt.transparent)
     p = QtGui.QPainter()
     if p.begin(img):
@@ -198,31 +341,56 @@ def make_app_icon(size=128) -> QtGui.QIcon:
         f = QtGui.QFont(); f.setBold(True); f.setPointSizeF(size*0.4); p.setFont(f)
         p.setPen(QtGui.QPen(QtGui.QColor("#e5e7eb"))); p.drawText(r, QtCore.Qt.AlignCenter, "NB")
         p.end()
-    icon = QtGui.QIcon(QtGui.QPixmap.fromImage(img)); make_app_icon._icon = icon; return icon
+        # Best effort: an unwritable cache dir just means painting again next start
+        try:
+            _ICON_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            img.save(str(_icon_cache_path(size)), "PNG")
+        except OSError:
+            pass
+    return img
 
 # ---------- UI pieces ----------
+# Set once on the cards container; cards only flip their dynamic properties.
+# Equal-specificity rules: later wins, so active > selected > hover > base.
+ENV_CARD_QSS = """
+    #cardsContainer { background:#0f141b; }
+    QFrame[envCard="true"] { background:#1a1f29; border:1px solid #2a3242; border-radius:12px; }
+    QFrame[envCard="true"]:hover { background:#202735; }
+    QFrame[envCard="true"][selected="true"] { background:#273244; }
+    QFrame[envCard="true"][active="true"] { background:#22303f; }
+"""
+
+# Status pill stylesheets by background color, filled on first use
+_PILL_QSS = {}
+
 class EnvCard(QtWidgets.QFrame):
     clicked = QtCore.Signal()
     def __init__(self, name: str, selected=False, active=False, parent=None):
         super().__init__(parent)
         self.name, self.selected, self.active = name, selected, active
+        self.setProperty("envCard", True)
         self.setCursor(QtCore.Qt.PointingHandCursor); self.setMinimumHeight(48)
         lay = QtWidgets.QHBoxLayout(self); lay.setContentsMargins(14, 10, 14, 10); lay.setSpacing(10)
         self.lbl = QtWidgets.QLabel(name); self.lbl.setStyleSheet("font-size:14px; font-weight:600; color:#e7e7ea;"); lay.addWidget(self.lbl); lay.addStretch(1)
         self.badge = QtWidgets.QLabel("Active" if active else ""); self.badge.setStyleSheet("padding:2px 8px; border-radius:9px; background:#064e3b; color:#a7f3d0; font-weight:600;")
         self.badge.setVisible(active); lay.addWidget(self.badge)
-        self._apply_style(False)
-    def setSelected(self, v): self.selected = v; self._apply_style(False)
-    def setActive(self, v): self.active = v; self.badge.setVisible(v); self.badge.setText("Active" if v else ""); self._apply_style(False)
-    def enterEvent(self, e): self._apply_style(True);  super().enterEvent(e)
-    def leaveEvent(self, e): self._apply_style(False); super().leaveEvent(e)
+        self._refresh_style()
+    # No-op transitions return early: each real one costs an unpolish/polish
+    def setSelected(self, v):
+        v = bool(v)
+        if v == self.selected: return
+        self.selected = v; self._refresh_style()
+    def setActive(self, v):
+        v = bool(v)
+        if v == self.active: return
+        self.active = v; self.badge.setVisible(v); self.badge.setText("Active" if v else ""); self._refresh_style()
     def mouseReleaseEvent(self, e):
         if e.button() == QtCore.Qt.LeftButton: self.clicked.emit()
         super().mouseReleaseEvent(e)
-    def _apply_style(self, hover):
-        base, hoverc, selectedc, activec, border = "#1a1f29", "#202735", "#273244", "#22303f", "#2a3242"
-        bg = activec if self.active else (selectedc if self.selected else (hoverc if hover else base))
-        self.setStyleSheet(f"QFrame {{ background:{bg}; border:1px solid {border}; border-radius:12px; }}")
+    def _refresh_style(self):
+        # Re-match ENV_CARD_QSS against the new properties; no sheet reparse
+        self.setProperty("selected", self.selected); self.setProperty("active", self.active)
+        self.style().unpolish(self); self.style().polish(self)
 
 class BaseDialog(QtWidgets.QDialog):
     def _strip_icons(self, box: QtWidgets.QDialogButtonBox):
@@ -274,11 +442,51 @@ def warn_box(parent, title, text):
 
 # ---------- UI Bus (signals to main thread) ----------
 class UIBus(QtCore.QObject):
-    log = QtCore.Signal(str)
-    pill = QtCore.Signal(str, str)          # text, color
     set_active = QtCore.Signal(object)      # name | None
     set_enabled = QtCore.Signal(bool)
     rebuild = QtCore.Signal()
+    envs_loaded = QtCore.Signal(object)     # list | Exception
+    wake = QtCore.Signal()                  # queue went from empty to non-empty
+
+    # Log lines and pill updates arrive in bursts, so workers queue them here
+    # and the window drains the queue shortly after the first one: one UI
+    # update per burst instead of one queued signal + repaint per line, and
+    # nothing at all while idle.
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock(); self._log_queue = deque(); self._pill = None
+        self._pending = False
+    def _post(self):
+        # Caller holds the lock; returns True for the post that needs a wake
+        first = not self._pending; self._pending = True; return first
+    def _wake(self):
+        try: self.wake.emit()
+        except RuntimeError: pass   # bus deleted at shutdown; nobody left to draw
+    def post_log(self, text: str):
+        with self._lock: self._log_queue.append(text); first = self._post()
+        if first: self._wake()
+    def post_pill(self, text: str, color: str):
+        with self._lock: self._pill = (text, color); first = self._post()   # only the latest matters
+        if first: self._wake()
+    def drain(self):
+        with self._lock:
+            batch = list(self._log_queue); self._log_queue.clear()
+            pill, self._pill = self._pill, None
+            self._pending = False
+        return batch, pill
+
+class Worker(QtCore.QRunnable):
+    """Run fn on a pool thread and re-enable the controls when it finishes."""
+    def __init__(self, fn, bus: UIBus):
+        super().__init__(); self.fn = fn; self.bus = bus
+    def run(self):
+        try:
+            self.fn()
+        finally:
+            try:
+                self.bus.set_enabled.emit(True)
+            except RuntimeError:
+                pass   # window and bus already deleted at shutdown
 
 # ---------- Main window ----------
 class MainWindow(QtWidgets.QMainWindow):
@@ -289,24 +497,33 @@ class MainWindow(QtWidgets.QMainWindow):
         self.selected_name = None
         self.active_name = None
         self.bus = UIBus()
+        # Set on close so in-flight worker polls stop instead of sleeping on.
+        self._closing = threading.Event()
+        # Reused worker threads for actions instead of one new thread per click
+        self._pool = QtCore.QThreadPool(); self._pool.setMaxThreadCount(4)   # ours, not the app-wide one
         self._apply_dark_palette(); self._build(); self._wire_bus()
         self._load_envs_initial()
 
     # wire signals
     def _wire_bus(self):
-        self.bus.log.connect(self._log)
-        self.bus.pill.connect(self._set_pill)
+        self.bus.wake.connect(self._schedule_flush)
         self.bus.set_active.connect(self._set_active_name)
         self.bus.set_enabled.connect(self._set_controls_enabled)
         self.bus.rebuild.connect(self._rebuild_cards)
+        self.bus.envs_loaded.connect(self._on_envs_loaded)
+
+    def closeEvent(self, e):
+        self._closing.set(); kill_children(); super().closeEvent(e)
 
     def _set_controls_enabled(self, enabled: bool):
-        for b in (self.btn_connect, self.btn_disconnect, self.btn_status,
-                  self.btn_add, self.btn_edit, self.btn_remove, self.btn_refresh):
-            b.setEnabled(enabled)
+        if enabled == self._buttons_enabled: return
+        self._buttons_enabled = enabled
+        for b in self._all_buttons: b.setEnabled(enabled)
 
     def _set_active_name(self, name):
-        self.active_name = name; self._rebuild_cards()
+        old, self.active_name = self.active_name, name
+        for n, v in ((old, False), (name, True)):
+            for card in self._cards_by_name.get(n, ()): card.setActive(v)
 
     def _apply_dark_palette(self):
         pal = QtGui.QPalette()
@@ -344,6 +561,7 @@ class MainWindow(QtWidgets.QMainWindow):
         logo.setStyleSheet("background:#1a1f29; color:#10b981; border-radius:6px; font-weight:900; letter-spacing:0.5px;")
         title = QtWidgets.QLabel("NetBird Environment Switcher"); title.setStyleSheet("font-size:18px; font-weight:700;")
         self.pill = QtWidgets.QLabel(" Ready "); self.pill.setStyleSheet("background:#374151; color:#e5e7eb; padding:6px 12px; border-radius:12px; font-weight:600;")
+        self._pill_color = None   # the "Ready" sheet above isn't one of _PILL_QSS
         header.addWidget(logo); header.addSpacing(8); header.addWidget(title); header.addStretch(1); header.addWidget(self.pill)
         outer.addLayout(header)
 
@@ -352,12 +570,16 @@ class MainWindow(QtWidgets.QMainWindow):
         search_lbl = QtWidgets.QLabel("Search")
         self.search = QtWidgets.QLineEdit(); self.search.setPlaceholderText("Type to filter environments…"); self.search.textChanged.connect(self._on_filter)
         search_row.addWidget(search_lbl); search_row.addSpacing(8); search_row.addWidget(self.search, 1); outer.addLayout(search_row)
+        self._filter_timer = QtCore.QTimer(self); self._filter_timer.setSingleShot(True); self._filter_timer.setInterval(120)
+        self._filter_timer.timeout.connect(self._on_filter_settled)
 
         # Middle
         middle = QtWidgets.QHBoxLayout(); middle.setSpacing(14)
         self.cards_container = QtWidgets.QWidget()
-        self.cards_container.setStyleSheet("background:#0f141b;")
+        self.cards_container.setObjectName("cardsContainer"); self.cards_container.setStyleSheet(ENV_CARD_QSS)
         self.cards_layout = QtWidgets.QVBoxLayout(self.cards_container); self.cards_layout.setContentsMargins(6, 6, 6, 6); self.cards_layout.setSpacing(10)
+        self.cards_layout.addStretch(1)  # cards are inserted above it
+        self._cards_by_name = {}   # name -> cards, one per env entry with that name
         scroll = QtWidgets.QScrollArea(); scroll.setWidgetResizable(True); scroll.setWidget(self.cards_container)
         middle.addWidget(scroll, 1)
 
@@ -384,105 +606,188 @@ class MainWindow(QtWidgets.QMainWindow):
         nets_lbl = QtWidgets.QLabel("Networks"); nets_lbl.setStyleSheet("font-weight:700; color:#cbd5e1;"); right.addWidget(nets_lbl)
         self.btn_refresh = QtWidgets.QPushButton("Refresh Networks"); self.btn_refresh.setToolTip("Select all networks then refresh")
         self.btn_refresh.clicked.connect(self.on_refresh_networks); right.addWidget(self.btn_refresh)
+        self._all_buttons = (self.btn_connect, self.btn_disconnect, self.btn_status,
+                             self.btn_add, self.btn_edit, self.btn_remove, self.btn_refresh)
+        self._buttons_enabled = True
 
         right.addStretch(1); middle.addLayout(right, 0)
         outer.addLayout(middle, 1)
 
         outer.addWidget(QtWidgets.QLabel("Activity Log"))
         self.log = QtWidgets.QPlainTextEdit(); self.log.setReadOnly(True); outer.addWidget(self.log, 2)
+        # Bounded, plain, unwrapped: appends stay O(1) however long the session runs
+        self.log.setMaximumBlockCount(2000); self.log.setWordWrapMode(QtGui.QTextOption.NoWrap); self.log.setUndoRedoEnabled(False)
 
         QtGui.QShortcut(QtGui.QKeySequence("Return"), self, activated=self.on_connect)
         QtGui.QShortcut(QtGui.QKeySequence("Ctrl+F"), self, activated=self.search.setFocus)
 
     # ----- load/render -----
     def _load_envs_initial(self):
+        # Read and parse on a pool thread so the window paints first; the
+        # list starts empty and the controls wait for the result.
+        self.envs = []; self.filtered = []; self._filter_q = ""; self._index_envs()
+        self._envs_saved = None   # save_envs token for the last write
+        self._set_controls_enabled(False)
+        self._pool.start(self._load_envs_worker)
+
+    def _load_envs_worker(self):
         try:
-            self.envs = load_envs(ENVS_PATH)
+            result = load_envs(ENVS_PATH)
         except Exception as e:
-            warn_box(self, "envs.json error", str(e)); ENVS_PATH.write_text("[]", encoding="utf-8"); self.envs = []
-        self.filtered = list(self.envs); self._rebuild_cards()
+            result = e
+        self.bus.envs_loaded.emit(result)
+
+    def _on_envs_loaded(self, result):
+        self._set_controls_enabled(True)
+        if isinstance(result, Exception):
+            warn_box(self, "envs.json error", str(result)); ENVS_PATH.write_text("[]", encoding="utf-8"); result = []
+        self.envs = result
+        self._index_envs(); self.filtered = list(self.envs); self._filter_q = ""; self._rebuild_cards()
         if not self.envs: info_box(self, "Empty list", f"No environments found.\nUse 'Add' to create entries in:\n{ENVS_PATH}")
 
+    def _index_envs(self):
+        # Lowercased names for the search filter plus name lookups; rebuilt
+        # whenever the set of env names changes (URL edits mutate the shared
+        # dicts, so they don't need it).
+        self._envs_lower = [(e, e["name"].lower()) for e in self.envs]
+        # Built in reverse so a duplicated name maps to its first entry
+        self._envs_by_name = {e["name"]: e for e in reversed(self.envs)}
+        self._envs_by_name_ci = {ln: e for e, ln in reversed(self._envs_lower)}
+
     def _rebuild_cards(self):
-        while self.cards_layout.count():
-            it = self.cards_layout.takeAt(0); w = it.widget()
-            if w: w.deleteLater()
-        for env in self.filtered:
-            name = env["name"]
-            card = EnvCard(name, selected=(name == self.selected_name), active=(name == self.active_name))
-            card.clicked.connect(lambda e=env: self._select_env(e))
-            self.cards_layout.addWidget(card)
-        self.cards_layout.addStretch(1)
-
-    def _select_env(self, env):
-        self.selected_name = env["name"]; self._rebuild_cards()
+        # Every env keeps a card in the layout and the search only toggles
+        # visibility (the way a filter proxy hides rows of a model), so
+        # typing never moves or recreates widgets. Only the true delta is
+        # built or destroyed: cards of removed envs are deleted. A hand-edited
+        # envs.json can repeat a name, so each occurrence gets its own card.
+        desired = [e["name"] for e in self.envs]
+        counts = Counter(desired)
+        for name, cards in list(self._cards_by_name.items()):
+            while len(cards) > counts[name]:
+                card = cards.pop(); self.cards_layout.removeWidget(card); card.deleteLater()
+            if not cards: del self._cards_by_name[name]
+        seen = Counter()
+        for i, name in enumerate(desired):
+            cards = self._cards_by_name.setdefault(name, [])
+            if seen[name] == len(cards):
+                card = EnvCard(name); cards.append(card)
+                card.clicked.connect(lambda n=name: self._select_env(n))
+            card = cards[seen[name]]; seen[name] += 1
+            if self.cards_layout.indexOf(card) != i:
+                self.cards_layout.removeWidget(card); self.cards_layout.insertWidget(i, card)
+            card.setSelected(name == self.selected_name); card.setActive(name == self.active_name)
+        self._apply_card_visibility()
+
+    def _apply_card_visibility(self):
+        shown = {e["name"] for e in self.filtered}
+        for name, cards in self._cards_by_name.items():
+            hidden = name not in shown
+            for card in cards:
+                if card.isHidden() != hidden: card.setHidden(hidden)
+
+    def _select_env(self, name):
+        old, self.selected_name = self.selected_name, name
+        for n, v in ((old, False), (name, True)):
+            for card in self._cards_by_name.get(n, ()): card.setSelected(v)
 
     def _on_filter(self, text: str):
-        q = text.strip().lower()
-        self.filtered = [e for e in self.envs if q in e["name"].lower()] if q else list(self.envs)
-        self._rebuild_cards()
+        # Debounced: a burst of keystrokes collapses into one filter pass
+        self._filter_timer.start()
+
+    def _on_filter_settled(self):
+        # Edits that leave the effective query as it was (case changes,
+        # padding spaces, type-then-undo) don't need another pass
+        if self.search.text().strip().lower() != self._filter_q:
+            self._apply_filter(self.search.text())
+
+    def _apply_filter(self, text: str):
+        q = self._filter_q = text.strip().lower()
+        self.filtered = [e for e, ln in self._envs_lower if q in ln] if q else list(self.envs)
+        self._apply_card_visibility()
 
     # slots (main thread)
+    @QtCore.Slot()
+    def _schedule_flush(self):
+        # Let the rest of the burst (~one frame) land before flushing
+        QtCore.QTimer.singleShot(16, self._flush_bus)
+
+    def _flush_bus(self):
+        batch, pill = self.bus.drain()
+        if batch: self._log("\n".join(batch))
+        if pill: self._set_pill(*pill)
+
     @QtCore.Slot(str)
     def _log(self, text: str):
-        self.log.appendPlainText(text); self.log.verticalScrollBar().setValue(self.log.verticalScrollBar().maximum())
+        cur = self.log.textCursor(); cur.movePosition(QtGui.QTextCursor.End)
+        if not self.log.document().isEmpty(): cur.insertBlock()
+        cur.insertText(text); self.log.setTextCursor(cur)
 
     @QtCore.Slot(str, str)
     def _set_pill(self, text: str, color: str):
-        self.pill.setText(f" {text} "); self.pill.setStyleSheet(f"background:{color}; color:#0b1220; padding:6px 12px; border-radius:12px; font-weight:700;")
+        # A handful of fixed colors: build each sheet once, and only hand Qt
+        # a new one (a CSS reparse + restyle) when the color actually changes
+        label = f" {text} "
+        if self.pill.text() != label: self.pill.setText(label)
+        if color != self._pill_color:
+            qss = _PILL_QSS.get(color)
+            if qss is None:
+                qss = _PILL_QSS[color] = f"background:{color}; color:#0b1220; padding:6px 12px; border-radius:12px; font-weight:700;"
+            self.pill.setStyleSheet(qss); self._pill_color = color
 
     # helpers
     def _ensure_down_quick(self, max_wait=2.0, step=0.2):
-        rc0, out0, _ = nb_status(True)
-        if rc0 == 0 and parse_mgmt_url(out0) is None: return
+        # Only the connected/disconnected state matters here, so the plain
+        # status is enough; '-d' adds peer and route tables we'd throw away.
+        # Not the cached one: on_connect has just restarted the service,
+        # which drops it.
+        rc0, out0, _ = nb_status(False)
+        if rc0 == 0 and not mgmt_connected(out0): return
         nb_down()
-        t_end = time.time() + max_wait
-        while time.time() < t_end:
-            rc, out, _ = nb_status(True)
-            if rc != 0 or parse_mgmt_url(out) is None: break
-            time.sleep(step)
+        # Check right away and back off up to `step`: `down` usually settles fast
+        delay = min(0.05, step); t_end = time.monotonic() + max_wait
+        while time.monotonic() < t_end:
+            rc, out, _ = nb_status(False)
+            if rc != 0 or not mgmt_connected(out): break
+            if self._closing.wait(delay): return
+            delay = min(delay * 1.6, step)
 
     def _run_bg(self, fn):
         self.bus.set_enabled.emit(False)
-        def wrapper():
-            try:
-                fn()
-            finally:
-                self.bus.set_enabled.emit(True)
-        threading.Thread(target=wrapper, daemon=True).start()
+        self._pool.start(Worker(fn, self.bus))
 
     # ----- manage envs (UI thread) -----
     def on_add(self):
         dlg = AddEnvDialog(self)
         if dlg.exec() == QtWidgets.QDialog.Accepted:
             name, url = dlg.get()
-            if not name or not url or not re.match(r"^https?://", url):
+            if not name or not url or not url.startswith(_URL_SCHEMES):
                 warn_box(self, "Invalid", "Please enter a name and a valid Management URL (http/https)."); return
-            exists = next((e for e in self.envs if e["name"].lower() == name.lower()), None)
+            exists = self._envs_by_name_ci.get(name.lower())
             if exists:
                 if ask_yes_no(self, "Overwrite?", f"Environment '{name}' exists. Overwrite its URL?", default_yes=False) != QtWidgets.QMessageBox.Yes:
                     return
                 exists["management_url"] = url
             else:
-                self.envs.append({"name": name, "management_url": url})
+                self.envs.append({"name": name, "management_url": url}); self._index_envs()
             try:
-                save_envs(ENVS_PATH, self.envs); self._log(f"✓ Saved '{name}' to {ENVS_PATH}")
-                self._on_filter(self.search.text())
+                self._envs_saved = save_envs(ENVS_PATH, self.envs, self._envs_saved); self._log(f"✓ Saved '{name}' to {ENVS_PATH}")
             except Exception as e:
                 warn_box(self, "Save failed", str(e))
+            # self.envs changed either way; keep the cards in step with it
+            self._rebuild_cards(); self._apply_filter(self.search.text())
 
     def on_edit(self):
         if not self.selected_name: info_box(self, "Select", "Pick an environment card first."); return
-        env = next(e for e in self.envs if e["name"] == self.selected_name)
+        env = self._envs_by_name[self.selected_name]
         dlg = EditEnvDialog(env["name"], env["management_url"], self)
         if dlg.exec() == QtWidgets.QDialog.Accepted:
             new_url = dlg.get()
-            if not new_url or not re.match(r"^https?://", new_url):
+            if not new_url or not new_url.startswith(_URL_SCHEMES):
                 warn_box(self, "Invalid", "Please enter a valid Management URL (http/https)."); return
             env["management_url"] = new_url
             try:
-                save_envs(ENVS_PATH, self.envs); self._log(f"✓ Updated '{env['name']}' URL in {ENVS_PATH}")
-                self._on_filter(self.search.text())
+                self._envs_saved = save_envs(ENVS_PATH, self.envs, self._envs_saved); self._log(f"✓ Updated '{env['name']}' URL in {ENVS_PATH}")
+                self._apply_filter(self.search.text())
             except Exception as e:
                 warn_box(self, "Save failed", str(e))
 
@@ -491,129 +796,153 @@ class MainWindow(QtWidgets.QMainWindow):
         name = self.selected_name
         if ask_yes_no(self, "Remove environment", f"Delete '{name}' from the list?", default_yes=False) != QtWidgets.QMessageBox.Yes:
             return
-        self.envs = [e for e in self.envs if e["name"] != name]
+        self.envs = [e for e in self.envs if e["name"] != name]; self._index_envs()
         try:
-            save_envs(ENVS_PATH, self.envs); self._log(f"✓ Removed '{name}' from {ENVS_PATH}")
-            if self.active_name == name: self.active_name = None
-            self.selected_name = None; self.filtered = list(self.envs); self._rebuild_cards()
+            self._envs_saved = save_envs(ENVS_PATH, self.envs, self._envs_saved); self._log(f"✓ Removed '{name}' from {ENVS_PATH}")
         except Exception as e:
             warn_box(self, "Save failed", str(e))
+        # self.envs changed either way; keep the cards in step with it
+        if self.active_name == name: self.active_name = None
+        self.selected_name = None; self.filtered = list(self.envs); self._filter_q = ""; self._rebuild_cards()
 
     # ----- networks (WORKER via _run_bg) -----
     def on_refresh_networks(self):
         def work():
-            self.bus.pill.emit("Refreshing…", "#0ea5a0")
-            self.bus.log.emit("Selecting all networks…")
+            self.bus.post_pill("Refreshing…", "#0ea5a0")
+            self.bus.post_log("Selecting all networks…")
             cmd, rc, out, err = networks_select_all()
             if rc == 0:
-                self.bus.log.emit(f"✓ Networks selected via: {cmd}")
-                if out: self.bus.log.emit(out)
+                self.bus.post_log(f"✓ Networks selected via: {cmd}")
+                if out: self.bus.post_log(out)
             else:
-                self.bus.log.emit(f"! Network select failed via: {cmd} (rc={rc})")
-                self.bus.log.emit(err or out or "no output")
-            self.bus.log.emit("Refreshing networks…")
+                self.bus.post_log(f"! Network select failed via: {cmd} (rc={rc})")
+                self.bus.post_log(err or out or "no output")
+            self.bus.post_log("Refreshing networks…")
             rc2, out2, err2 = networks_refresh()
             if rc2 == 0:
-                self.bus.log.emit("✓ Networks refreshed")
-                if out2: self.bus.log.emit(out2)
-                self.bus.pill.emit("Refreshed", "#10b981")
+                self.bus.post_log("✓ Networks refreshed")
+                if out2: self.bus.post_log(out2)
+                self.bus.post_pill("Refreshed", "#10b981")
             else:
-                self.bus.log.emit(f"! Network refresh failed (rc={rc2})")
-                self.bus.log.emit(err2 or out2 or "no output")
-                self.bus.pill.emit("Refresh failed", "#ef4444")
+                self.bus.post_log(f"! Network refresh failed (rc={rc2})")
+                self.bus.post_log(err2 or out2 or "no output")
+                self.bus.post_pill("Refresh failed", "#ef4444")
         self._run_bg(work)
 
     # ----- status/connect/disconnect (WORKER) -----
     def on_status(self):
         def work():
-            self.bus.pill.emit("Checking…", "#f59e0b")
-            rc, out, err = nb_status(True)
+            self.bus.post_pill("Checking…", "#f59e0b")
+            rc, out, err = nb_status_cached(True)
             if rc == 0:
                 mgmt = parse_mgmt_url(out)
                 if mgmt:
-                    self.bus.pill.emit("Connected", "#10b981")
-                    self.bus.log.emit(out); self.bus.log.emit(f"✓ Management: {mgmt}")
+                    self.bus.post_pill("Connected", "#10b981")
+                    self.bus.post_log(out); self.bus.post_log(f"✓ Management: {mgmt}")
                 else:
-                    self.bus.pill.emit("Disconnected", "#6b7280"); self.bus.log.emit("i Not connected.")
+                    self.bus.post_pill("Disconnected", "#6b7280"); self.bus.post_log("i Not connected.")
             else:
-                self.bus.pill.emit("Error", "#ef4444"); self.bus.log.emit(f"status failed (rc={rc}): {err or out}")
+                self.bus.post_pill("Error", "#ef4444"); self.bus.post_log(f"status failed (rc={rc}): {err or out}")
         self._run_bg(work)
 
     def on_disconnect(self):
         if not self.selected_name: info_box(self, "Select", "Pick an environment card first."); return
         def work():
-            self.bus.pill.emit("Disconnecting…", "#f59e0b")
+            self.bus.post_pill("Disconnecting…", "#f59e0b")
             rc, out, err = nb_down()
             self.bus.set_active.emit(None)   # clear active
             if rc == 0:
-                self.bus.pill.emit("Disconnected", "#6b7280"); self.bus.log.emit("✓ Disconnected.")
+                self.bus.post_pill("Disconnected", "#6b7280"); self.bus.post_log("✓ Disconnected.")
             else:
-                self.bus.pill.emit("Error", "#ef4444"); self.bus.log.emit(f"down failed (rc={rc}): {err or out}")
+                self.bus.post_pill("Error", "#ef4444"); self.bus.post_log(f"down failed (rc={rc}): {err or out}")
         self._run_bg(work)
 
     def on_connect(self):
         if not self.selected_name: info_box(self, "Select", "Pick an environment card first."); return
-        env = next(e for e in self.envs if e["name"] == self.selected_name)
+        env = self._envs_by_name[self.selected_name]
         name, url = env["name"], env["management_url"]
         def work():
-            self.bus.pill.emit("Connecting…", "#0ea5a0"); self.bus.log.emit(f"Connecting to {name} ...")
+            self.bus.post_pill("Connecting…", "#0ea5a0"); self.bus.post_log(f"Connecting to {name} ...")
 
-            # Try to start the service (may require root on some setups)
+            # Try to start the service (may require root on some setups).
+            # This has to finish before the reset below: `down`/`status` need
+            # a running daemon, and a freshly started one may reconnect to
+            # the previous management server.
             rc, out, err = nb_service_start()
             if rc == 0:
-                self.bus.log.emit("✓ Service started (or already running).")
+                self.bus.post_log("✓ Service started (or already running).")
             else:
-                self.bus.log.emit("i Could not start service as normal user (this is OK if it's already running).")
+                self.bus.post_log("i Could not start service as normal user (this is OK if it's already running).")
                 if err or out:
-                    self.bus.log.emit((err or out))
-                self.bus.log.emit("i If needed, start it manually: sudo netbird service start")
+                    self.bus.post_log((err or out))
+                self.bus.post_log("i If needed, start it manually: sudo netbird service start")
 
-            self.bus.log.emit("Resetting session...")
+            self.bus.post_log("Resetting session...")
             self._ensure_down_quick(max_wait=2.0, step=0.2)
+            if self._closing.is_set(): return
 
             # Launch `up` without waiting so the browser can open
             proc = nb_up_async(url)
             if not proc:
-                self.bus.pill.emit("Error", "#ef4444")
-                self.bus.log.emit("! Failed to launch `netbird up`.")
+                self.bus.post_pill("Error", "#ef4444")
+                self.bus.post_log("! Failed to launch `netbird up`.")
                 return
 
-            # start output streaming in background
-            threading.Thread(target=_pump_proc_output, args=(proc, self.bus), daemon=True).start()
-            # Poll up to 3 minutes for connection
+            # start output streaming in background; it reports the management
+            # URL as soon as `up` prints it
+            found = threading.Event(); found_url = []
+            def on_mgmt(u): found_url.append(u); found.set()
+            pump = threading.Thread(target=_pump_proc_output, args=(proc, self.bus, on_mgmt), daemon=True)
+            pump.start()
+            # Wait up to 3 minutes for connection, backing off from 100ms to 1s.
+            # While `up` is still running its output is the main source, so
+            # status is only probed every 5s as a fallback. The plain status
+            # is a cheap gate; only ask for details (and the URL) once it
+            # reports management as connected.
             mgmt = None
-            for _ in range(180):
-                time.sleep(1)
+            delay = 0.1; deadline = time.monotonic() + 180; next_probe = 0.0
+            while time.monotonic() < deadline:
+                if found.wait(delay): mgmt = found_url[0]; break
+                if self._closing.is_set(): return
+                delay = min(delay * 1.6, 1.0)
+                if proc.poll() is None and time.monotonic() < next_probe: continue
+                next_probe = time.monotonic() + 5
+                rc2, out2, err2 = nb_status(False)
+                if rc2 != 0 or not mgmt_connected(out2): continue
                 rc2, out2, err2 = nb_status(True)
                 if rc2 == 0:
                     mgmt = parse_mgmt_url(out2)
                     if mgmt: break
 
-            # Best-effort: drain any output from the `up` command if it ended
-            try:
-                if proc.poll() is not None:
-                    out_up, err_up = proc.communicate(timeout=0.25)
-                    if out_up: self.bus.log.emit(out_up)
-                    if err_up: self.bus.log.emit(err_up)
-            except Exception:
-                pass
+            # The pump owns the pipe and logs everything `up` printed; if `up`
+            # ended (poll() has reaped it), let the pump reach EOF so its last
+            # lines come before the result below.
+            if proc.poll() is not None:
+                pump.join(timeout=0.25)
 
             if mgmt:
-                self.bus.pill.emit("Connected", "#10b981"); self.bus.log.emit(f"✓ Connected to: {mgmt}")
+                self.bus.post_pill("Connected", "#10b981"); self.bus.post_log(f"✓ Connected to: {mgmt}")
                 self.bus.set_active.emit(self.selected_name)
             else:
-                self.bus.pill.emit("Connected?", "#f59e0b")
-                self.bus.log.emit("i No management URL detected yet. If your browser didn't open, run the same command in a terminal:")
-                self.bus.log.emit(f'netbird up --management-url "{url}"')
+                self.bus.post_pill("Connected?", "#f59e0b")
+                self.bus.post_log("i No management URL detected yet. If your browser didn't open, run the same command in a terminal:")
+                self.bus.post_log(shlex.join(["netbird", "up", "--management-url", url]))
 
         self._run_bg(work)
 
 def main():
+    # Process-wide Qt setup happens here, not at import time
+    QtCore.qInstallMessageHandler(_qt_msg_handler)
+    QtWidgets.QApplication.setStyle("Fusion")
     app = QtWidgets.QApplication(sys.argv)
     app.setWindowIcon(make_app_icon())
     _require_linux_or_exit()   # Linux-only; no root requirement
     win = MainWindow(); win.show()
-    sys.exit(app.exec())
+    rc = app.exec()
+    # Workers wind down quickly once closeEvent killed their children;
+    # don't hang on one that doesn't
+    win._pool.waitForDone(3000)
+    sys.exit(rc)
 
 if __name__ == "__main__":
     main()